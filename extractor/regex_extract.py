@@ -70,10 +70,59 @@ def contains_exclusions_section(title, text):
     Checks regex against:
         - The section title
         - First 2000 characters of the section body (performance vs. coverage tradeoff)
+    The body window uses the pattern's pos/endpos arguments instead of
+    slicing, so no 2 KB throwaway string is allocated per section.
     Returns:
         bool: True if exclusion-related phrase detected.
     """
-    return bool(EXCLUSION_HEADINGS.search(title)) or bool(EXCLUSION_HEADINGS.search(text[:2000]))
+    return (EXCLUSION_HEADINGS.search(title) is not None
+            or EXCLUSION_HEADINGS.search(text, 0, 2000) is not None)
+
+# TRIGGER_KEYWORDS:
+#   Lowercase literal substrings that must be present for any feature
+#   regex to possibly match. Most sections contain none of them, so a
+#   C-level substring sweep rejects the common case before the regex
+#   engine is touched. With this few literals, plain `in` checks beat
+#   pulling in an Aho-Corasick automaton dependency.
+TRIGGER_KEYWORDS = (
+    "deductible", "excess", "you will bear", "you are liable",
+    "waiting period", "exclusion", "not covered", "we will not pay",
+)
+
+def extract_section_features(title, text):
+    """
+    Extract all three per-section features for one section.
+    Equivalent to calling find_deductible + find_waiting +
+    contains_exclusions_section. The win over three bare calls is the
+    keyword prefilter: most sections contain no trigger literal at all,
+    so the regex engine usually never runs. On a trigger hit the three
+    original patterns are searched independently — fusing them into one
+    alternation is not safe, because an earlier alternative can consume
+    text a later one should match (e.g. a deductible capture swallowing
+    a nearby waiting-period phrase).
+    Returns:
+        dict: keys 'deductible', 'waiting_period' (str | None) and
+              'is_exclusion' (bool).
+    """
+    is_exclusion = EXCLUSION_HEADINGS.search(title) is not None
+
+    # Keyword prefilter: if no trigger literal occurs anywhere in the
+    # section, none of the feature patterns can match — skip them all.
+    low = text.lower()
+    if not any(k in low for k in TRIGGER_KEYWORDS):
+        return {
+            "deductible": None,
+            "waiting_period": None,
+            "is_exclusion": is_exclusion,
+        }
+
+    return {
+        "deductible": find_deductible(text),
+        "waiting_period": find_waiting(text),
+        # Body window matches contains_exclusions_section (first 2000 chars)
+        "is_exclusion": is_exclusion
+            or EXCLUSION_HEADINGS.search(text, 0, 2000) is not None,
+    }
 
 # Example usage block for quick manual testing.
 if __name__ == "__main__":
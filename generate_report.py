@@ -7,6 +7,13 @@ Report generation script:
   with only flagged sections retained
 - Prints summary line with count of flagged sections per file
 
+Performance notes:
+- orjson parses/serializes several times faster than stdlib json and
+  works on bytes, skipping Python-level UTF-8 decode/encode
+- os.scandir avoids the extra stat per entry that listdir + join incurs
+- Files are independent, so the per-file work fans out across a
+  ProcessPoolExecutor
+
 Potential extensions:
 - Aggregate statistics across all reports
 - Produce CSV or Markdown summaries
@@ -16,19 +23,35 @@ Assumptions:
 - Input JSON file structure matches output of run_pipeline.py.
 """
 
-import json, os  # Standard libraries for filesystem operations and JSON handling
+import os  # Filesystem iteration
+from concurrent.futures import ProcessPoolExecutor  # Parallel per-file workers
+
+import orjson  # Fast C JSON codec (bytes in / bytes out)
 
 IN_DIR, OUT_DIR = "data/parsed", "data/reports"  # Source of parsed sections & destination for reports
 os.makedirs(OUT_DIR, exist_ok=True)  # Ensure reports directory exists
 
-# Iterate over every file in the parsed directory
-for f in os.listdir(IN_DIR):
-    data = json.load(open(os.path.join(IN_DIR, f), encoding="utf-8"))  # Load list of section dicts
+def report_one(path):
+    """
+    Build the report for a single parsed JSON file.
+    Returns (file_name, flagged_count) for the driver's summary line.
+    """
+    fname = os.path.basename(path)
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read())  # Load list of section dicts
 
     # Filter sections that have at least one of the "risk" features
     risky = [d for d in data if d["deductible"] or d["waiting_period"] or d["is_exclusion"]]
 
     # Write filtered list to a .report.json file (mirrors original name)
-    json.dump(risky, open(os.path.join(OUT_DIR, f.replace(".json", ".report.json")), "w"), indent=2)
+    out_path = os.path.join(OUT_DIR, fname.replace(".json", ".report.json"))
+    with open(out_path, "wb") as f:
+        f.write(orjson.dumps(risky, option=orjson.OPT_INDENT_2))
+
+    return fname, len(risky)
 
-    print("⚠️", f, "->", len(risky), "flags")  # Console summary with count of flagged sections
\ No newline at end of file
+if __name__ == "__main__":
+    paths = [e.path for e in os.scandir(IN_DIR) if e.name.endswith(".json")]
+    with ProcessPoolExecutor() as ex:
+        for fname, n_flags in ex.map(report_one, paths):
+            print("⚠️", fname, "->", n_flags, "flags")  # Console summary per file
@@ -5,8 +5,7 @@
 #
 # Dependencies:
 #   - fitz (PyMuPDF) for PDF text and rasterization
-#   - pytesseract + Pillow (PIL.Image) for OCR
-#   - io for in‑memory byte buffers
+#   - the tesseract binary (via subprocess, fed PGM over stdin) for OCR
 #   - re for regular expressions
 #
 # Notes:
@@ -15,16 +14,130 @@
 #   - The logic is heuristic; may be refined or replaced with a more robust structure parser later.
 
 import fitz  # PyMuPDF: open PDFs and extract text / render pages
-import pytesseract  # Tesseract OCR engine wrapper
-from PIL import Image  # Image object for OCR processing
-import io  # In‑memory bytes buffer for pixmap data
-import os  # Filesystem operations (not heavily used here but imported)
+import io  # StringIO buffer for streaming page text accumulation
+import multiprocessing  # parent_process: detect running inside a pool worker
+import os  # cpu_count for sizing the OCR worker pool
 import re  # Regular expressions for heading detection
+import subprocess  # Drive the tesseract binary directly over stdin/stdout
+from concurrent.futures import ProcessPoolExecutor  # Parallel OCR across cores
+
+try:
+    # Persistent in-process Tesseract API: one model load per worker process
+    # instead of a fresh subprocess (and ~20% init cost) per page.
+    from tesserocr import OEM, PyTessBaseAPI
+except ImportError:  # Fall back to piping PGM bytes to the tesseract binary
+    PyTessBaseAPI = None
+
+_TESS_API = None  # Lazily created per-process PyTessBaseAPI instance
+_TESS_API_FAILED = False  # Init raised once; don't retry, use the subprocess path
+
+def _get_tess_api():
+    """
+    Return this process's persistent Tesseract API, creating it once, or
+    None if it can't be created. tesserocr can import fine yet fail to
+    init at runtime (RuntimeError when it can't locate tessdata); the
+    failure is remembered so each page falls straight through to the
+    subprocess path instead of re-raising inside the OCR pool.
+    """
+    global _TESS_API, _TESS_API_FAILED
+    if _TESS_API is None and not _TESS_API_FAILED:
+        try:
+            # Same engine/layout settings the subprocess path passes as
+            # flags: LSTM-only engine, page-segmentation mode from TESS_PSM
+            # (tesserocr takes the raw int; its PSM class is just a
+            # namespace of constants).
+            _TESS_API = PyTessBaseAPI(psm=TESS_PSM, oem=OEM.LSTM_ONLY)
+        except RuntimeError as e:
+            print("⚠️ tesserocr init failed, falling back to tesseract binary:", e)
+            _TESS_API_FAILED = True
+    return _TESS_API
+
+OCR_TEXT_THRESHOLD = 50  # Below this many native chars a page is treated as scanned
+# Render DPI and Tesseract page-segmentation mode are env-tunable so a
+# corpus of unusual scans can trade speed for accuracy without code edits.
+OCR_DPI = int(os.getenv("PS_OCR_DPI", "150"))  # 150 DPI keeps >=12pt clause text legible at ~half the pixels of 200
+TESS_PSM = int(os.getenv("PS_TESS_PSM", "6"))  # PSM 6: single uniform block, typical policy page
+OCR_RETRY_DPI = 250      # Second attempt for pages where the low-DPI OCR came back near-empty
+OCR_RETRY_THRESHOLD = 30  # Fewer OCR chars than this triggers the high-DPI retry
+
+def _needs_ocr(page):
+    """
+    Born-digital check for the OCR fallback. Counts characters in true
+    text blocks (block type 0) via get_text("blocks") instead of len() on
+    the raw dump — whitespace-padded scans with a few stray extractable
+    characters still qualify for OCR — and requires at least one embedded
+    image, so blank pages and near-empty covers never hit Tesseract.
+    """
+    n_text_chars = sum(len(b[4]) for b in page.get_text("blocks") if b[6] == 0)
+    return n_text_chars < OCR_TEXT_THRESHOLD and bool(page.get_images(full=False))
+
+def _page_raster(page, dpi):
+    """Render a page to raw grayscale samples for the OCR workers."""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return (pix.samples, pix.width, pix.height)
+
+def _ocr_raster(raster):
+    """
+    OCR worker: wrap the raw grayscale samples in a binary PGM header and
+    pipe them to the tesseract binary over stdin. PGM is just
+    'P5 <w> <h> 255\\n' followed by one byte per pixel, which Leptonica
+    reads natively — so no PIL image object, no TIFF/PNG encode, and no
+    temp file anywhere between the PyMuPDF render and the OCR engine.
+    Runs inside a ProcessPoolExecutor worker so Tesseract's CPU cost
+    scales across cores instead of serializing page by page. When
+    tesserocr is installed, a persistent per-process API is used instead:
+    the recognition model loads once per worker and each page is just a
+    SetImageBytes + GetUTF8Text call, skipping subprocess spawn and
+    engine init entirely.
+    """
+    samples, width, height = raster
+    api = _get_tess_api() if PyTessBaseAPI is not None else None
+    if api is not None:
+        # Grayscale: 1 byte per pixel, rows packed at width bytes per line.
+        api.SetImageBytes(samples, width, height, 1, width)
+        return api.GetUTF8Text()
+    pgm = b"P5 %d %d 255\n" % (width, height) + samples
+    proc = subprocess.run(
+        ["tesseract", "stdin", "stdout", "--oem", "1", "--psm", str(TESS_PSM)],
+        input=pgm,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        # Fail loudly (like pytesseract's TesseractError did) instead of
+        # letting a broken install flow downstream as empty page text.
+        raise RuntimeError(
+            "tesseract exited with %d: %s"
+            % (proc.returncode, proc.stderr.decode("utf-8", errors="replace").strip())
+        )
+    return proc.stdout.decode("utf-8", errors="replace")
+
+_OCR_POOL = None  # Lazily created, reused for every document this process parses
+
+def _get_ocr_pool():
+    """
+    Return this process's shared OCR executor, creating it once. Sharing
+    the pool avoids spawn/teardown cost per scanned document, and the
+    default worker count stays modest when this code already runs inside
+    a pool worker (run_pipeline.py starts one parser per core — a
+    cpu_count-sized OCR pool under each of those would oversubscribe the
+    machine several times over). OCR_CONCURRENCY overrides the default
+    either way. concurrent.futures joins the pool at interpreter exit.
+    """
+    global _OCR_POOL
+    if _OCR_POOL is None:
+        default = 2 if multiprocessing.parent_process() is not None else (os.cpu_count() or 1)
+        workers = int(os.getenv("OCR_CONCURRENCY", default))
+        _OCR_POOL = ProcessPoolExecutor(max_workers=workers)
+    return _OCR_POOL
 
 def extract_text_from_pdf(path):
     """
     Extract text from every page of a PDF.
     Fallback to OCR for pages that yield very little textual content (suggesting scanned images).
+    Two phases: the first walks pages in-process, keeping native text and
+    rasterizing pages that need OCR; the second OCRs all rasterized pages
+    in parallel across a process pool and stitches results back in page order.
     Args:
         path (str): Filesystem path to the PDF.
     Returns:
@@ -32,25 +145,84 @@ def extract_text_from_pdf(path):
             - Concatenated text across all pages separated by newline.
             - Boolean flag indicating whether at least one page required OCR (scanned).
     """
-    doc = fitz.open(path)          # Open PDF document
-    full_text = []                 # Accumulate page texts (native or OCR)
-    is_scanned = False             # Track if any page required OCR fallback
-
-    for page_num in range(len(doc)):  # Iterate over each page index
-        page = doc[page_num]          # Retrieve page object
-        text = page.get_text("text")  # Native text extraction (layout‑aware mode omitted)
-
-        if len(text.strip()) < 50:    # Heuristic: too little text → likely scanned image page
-            # Invoke OCR fallback:
-            is_scanned = True
-            pix = page.get_pixmap(dpi=200)           # Render page as raster image at higher DPI for OCR clarity
-            img = Image.open(io.BytesIO(pix.tobytes()))  # Build PIL Image from pixmap bytes
-            ocr_text = pytesseract.image_to_string(img)  # OCR extract textual content
-            full_text.append(ocr_text)               # Append OCR result
-        else:
-            full_text.append(text)                   # Append native extraction
-
-    return "\n".join(full_text), is_scanned          # Join all page texts with newlines
+    page_texts = []                # One slot per page (None until OCR fills it)
+    ocr_jobs = []                  # (page_index, raster) for scanned pages
+
+    # Context manager closes the document (and its file handle) promptly —
+    # leaked handles add up across thousands of PDFs in the parallel
+    # pipeline. Iterating the document walks pages natively instead of
+    # re-resolving each one by index.
+    with fitz.open(path) as doc:
+        for page_num, page in enumerate(doc):
+            text = page.get_text("text")  # Native text extraction (layout‑aware mode omitted)
+
+            if _needs_ocr(page):  # Sparse text blocks + embedded images -> scanned
+                ocr_jobs.append((page_num, _page_raster(page, OCR_DPI)))
+                page_texts.append(None)             # Placeholder until OCR completes
+            else:
+                page_texts.append(text)             # Append native extraction
+
+        is_scanned = bool(ocr_jobs)  # Any OCR page marks the document as scanned
+        if ocr_jobs:
+            # Fan the rendered pages out across the shared pool; map
+            # preserves order. The pool persists across documents, so
+            # scanned PDFs don't pay executor spawn/teardown each time.
+            ex = _get_ocr_pool()
+            results = ex.map(_ocr_raster, [raster for _, raster in ocr_jobs])
+            for (page_num, _), ocr_text in zip(ocr_jobs, results):
+                page_texts[page_num] = ocr_text
+
+            # Low-DPI OCR occasionally whiffs on faint scans; re-render
+            # just those pages at a higher DPI and try once more (the
+            # document is still open here for the re-render).
+            retry_jobs = [
+                (page_num, _page_raster(doc[page_num], OCR_RETRY_DPI))
+                for page_num, _ in ocr_jobs
+                if len(page_texts[page_num].strip()) < OCR_RETRY_THRESHOLD
+            ]
+            if retry_jobs:
+                results = ex.map(_ocr_raster, [raster for _, raster in retry_jobs])
+                for (page_num, _), ocr_text in zip(retry_jobs, results):
+                    page_texts[page_num] = ocr_text
+
+    # Stream page texts into a single StringIO buffer (newline-separated,
+    # matching the old "\n".join) instead of keeping a list of page
+    # strings alive next to the final megastring.
+    buf = io.StringIO()
+    for i, t in enumerate(page_texts):
+        if i:
+            buf.write("\n")
+        buf.write(t)
+    return buf.getvalue(), is_scanned
+
+def iter_page_texts(path):
+    """
+    Lazily yield (page_number, text) for each page of a PDF, applying the
+    same OCR fallback rules as extract_text_from_pdf one page at a time.
+    Lets callers stream very large documents without ever materializing
+    the full text in RAM. OCR here runs in-process and sequentially —
+    use extract_text_from_pdf when pooled OCR throughput matters more
+    than peak memory.
+    """
+    with fitz.open(path) as doc:
+        for page_num, page in enumerate(doc):
+            text = page.get_text("text")
+            if _needs_ocr(page):
+                text = _ocr_raster(_page_raster(page, OCR_DPI))
+                if len(text.strip()) < OCR_RETRY_THRESHOLD:
+                    text = _ocr_raster(_page_raster(page, OCR_RETRY_DPI))
+            yield page_num, text
+
+# HEADING_PATTERN:
+#   Heading heuristic for split_into_sections, per line (MULTILINE):
+#   - ALL CAPS segment (letters/spaces/hyphen/apostrophe, ≥4 chars)
+#   - OR digits + literal '.' + whitespace + content (numbered heading)
+#   Compiled once at import so every document (and every multiprocessing
+#   worker) reuses it instead of re-running re.compile per call.
+HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?P<title>[A-Z][A-Z \t\-']{3,}|[0-9]+\.[ \t]+\S.*?)[ \t]*$",
+    re.M,
+)
 
 # basic section splitter
 def split_into_sections(text):
@@ -60,6 +232,8 @@ def split_into_sections(text):
         - A heading is a line either:
             * In ALL CAPS (≥4 characters allowing spaces, hyphens, apostrophes)
             * Starts with digits + '.' (e.g. '2. Scope', '10. TERMS')
+    One module-level HEADING_PATTERN finditer pass locates all headings;
+    bodies are sliced between consecutive matches.
     Args:
         text (str): Full document text.
     Returns:
@@ -67,34 +241,22 @@ def split_into_sections(text):
             - 'title': heading/title string
             - 'text': content accumulated under that heading
     """
-    # heuristic: headings are lines in ALL CAPS or lines that start with numbers + dot
-    lines = text.splitlines()  # Split document into individual lines
-    sections = []              # Output list of section dicts
-    current_title = "start"    # Default initial section title
-    current_buf = []           # Buffer for lines belonging to current section
-
-    # Regex: start of line followed by:
-    #   - ALL CAPS segment (letters/spaces/hyphen/apostrophe, ≥4 chars)
-    #   - OR digits + '.' + whitespace (numbered heading)
-    heading_pattern = re.compile(r"^([A-Z][A-Z\s\-']{3,}|[0-9]+.\s+)")
-
-    for line in lines:
-        if heading_pattern.match(line.strip()):  # Detected heading line
-            if current_buf:  # Flush previous section if buffer has content
-                sections.append({
-                    "title": current_title.strip(),
-                    "text": "\n".join(current_buf).strip()
-                })
-            current_title = line.strip()  # Start new section title
-            current_buf = []              # Reset buffer for new section
-        else:
-            current_buf.append(line)      # Accumulate line under current section
-
-    # Flush final buffered section (if any)
-    if current_buf:
+    matches = list(HEADING_PATTERN.finditer(text))
+    sections = []  # Output list of section dicts
+
+    # Any text before the first heading keeps the historical "start" title.
+    preamble_end = matches[0].start() if matches else len(text)
+    preamble = text[:preamble_end].strip()
+    if preamble:
+        sections.append({"title": "start", "text": preamble})
+
+    # Each section's body runs from the end of its heading line to the
+    # start of the next heading (or end of document).
+    for m, nxt in zip(matches, matches[1:] + [None]):
+        end = nxt.start() if nxt else len(text)
         sections.append({
-            "title": current_title.strip(),
-            "text": "\n".join(current_buf).strip()
+            "title": m.group("title").strip(),
+            "text": text[m.end():end].strip(),
         })
 
     return sections  # Return list of structured sections
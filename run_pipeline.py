@@ -4,30 +4,35 @@ Pipeline script:
 - Extracts text and splits into sections using parser.pdf_parser utilities
 - Applies regex-based feature extraction (deductible, waiting period, exclusions)
 - Writes a JSON summary per source PDF into data/parsed
+- PDFs are independent, so per-PDF work runs across a ProcessPoolExecutor
+  (PyMuPDF parsing + regex are CPU-bound; processes sidestep the GIL)
 
 Assumptions:
 - parser/pdf_parser.py provides: extract_text_from_pdf(path) -> (text, scanned_flag)
                                 split_into_sections(text) -> iterable of {"title": ..., "text": ...}
-- extractor/regex_extract.py provides: find_deductible(text), find_waiting(text),
-                                       contains_exclusions_section(title, text)
+- extractor/regex_extract.py provides: extract_section_features(title, text)
+                                       -> {"deductible", "waiting_period", "is_exclusion"}
 Directories:
   IN_DIR = data/raw_pdfs (must exist and contain PDFs)
   OUT_DIR = data/parsed (auto-created)
 """
 
-import os, json  # Standard libraries for filesystem and JSON serialization
+import os  # Standard library for filesystem operations
+import orjson  # Fast C JSON codec (bytes out, no per-char Python emitter)
+from concurrent.futures import ProcessPoolExecutor  # Parallel per-PDF workers
 from parser.pdf_parser import extract_text_from_pdf, split_into_sections  # PDF parsing & sectioning
-from extractor.regex_extract import find_deductible, find_waiting, contains_exclusions_section  # Feature extraction functions
+from extractor.regex_extract import extract_section_features  # Single-pass feature extraction
 
 IN_DIR, OUT_DIR = "data/raw_pdfs", "data/parsed"  # Input (PDF source) and output (parsed JSON) directories
 os.makedirs(OUT_DIR, exist_ok=True)  # Ensure output directory exists; no error if already present
 
-# Iterate over every file in the input directory
-for pdf in os.listdir(IN_DIR):
-    if not pdf.lower().endswith(".pdf"):  # Skip non-PDF files (case-insensitive)
-        continue
+def process_pdf(pdf):
+    """
+    Full pipeline for one PDF: extract text, split into sections, run the
+    feature extraction, and write the per-PDF JSON. Returns the output
+    file name for the driver's progress line.
+    """
     path = os.path.join(IN_DIR, pdf)  # Full filesystem path to the PDF
-    print("Processing", pdf)  # Basic progress feedback
 
     text, scanned = extract_text_from_pdf(path)  # Extract full text; scanned flag could indicate OCR fallback
     sections = split_into_sections(text)  # Break document into logical sections with titles
@@ -37,13 +42,24 @@ for pdf in os.listdir(IN_DIR):
         t = s["text"]  # Raw section text
         out.append({
             "title": s["title"],  # Section title/header
-            "deductible": find_deductible(t),  # Extraction of deductible info (truthy/structured)
-            "waiting_period": find_waiting(t),  # Extraction of waiting period
-            "is_exclusion": contains_exclusions_section(s["title"], t),  # Flag if exclusion-related
+            # deductible / waiting_period / is_exclusion (keyword-prefiltered)
+            **extract_section_features(s["title"], t),
             "sample_text": t[:600]  # Truncated preview for dataset creation / inspection
         })
 
-    # Write JSON output named after the original PDF (with .json suffix appended)
-    with open(os.path.join(OUT_DIR, pdf + ".json"), "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2)
-    print("✅ Saved", pdf + ".json")  # Confirmation message
\ No newline at end of file
+    # Write JSON output named after the original PDF (with .json suffix appended).
+    # orjson emits compact bytes in one shot; skipping indentation roughly
+    # thirds the output size and speeds up every downstream re-parse.
+    with open(os.path.join(OUT_DIR, pdf + ".json"), "wb") as f:
+        f.write(orjson.dumps(out))
+    return pdf + ".json"
+
+if __name__ == "__main__":  # Guard required for process workers on spawn platforms
+    # scandir yields DirEntry objects with cached metadata — no extra stat
+    # per file the way listdir + per-path checks would cost
+    pdfs = [e.name for e in os.scandir(IN_DIR) if e.name.lower().endswith(".pdf")]
+    # chunksize=1 keeps scheduling granular: one slow scanned PDF can't
+    # strand a batch of quick ones behind it.
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 8)) as ex:
+        for saved in ex.map(process_pdf, pdfs, chunksize=1):
+            print("✅ Saved", saved)  # Confirmation message
@@ -14,9 +14,15 @@ pip install datasets transformers scikit-learn numpy
 """
 
 from datasets import load_dataset  # Hugging Face datasets loader
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer  # Core transformer components
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer, DataCollatorWithPadding  # Core transformer components
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support  # Evaluation metrics
 import numpy as np  # Numerical operations
+import os  # cpu_count for parallel dataset preprocessing
+import torch  # GPU capability probing for mixed precision / fused optimizer
+
+# Mixed precision: prefer bf16 on Ampere+ (no loss scaling needed), else fp16.
+USE_BF16 = torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+USE_FP16 = torch.cuda.is_available() and not USE_BF16
 
 MODEL_NAME = "distilbert-base-uncased"  # Pretrained base model identifier
 
@@ -27,31 +33,39 @@ dataset = load_dataset("csv", data_files="data/training_dataset.csv")
 dataset = dataset["train"].train_test_split(test_size=0.2, seed=42)
 
 # Initialize tokenizer for chosen model; will produce input_ids, attention_mask
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-
-def tokenize(batch):
-    """
-    Tokenize a batch of examples.
-    - truncation: ensures sequences don't exceed max_length
-    - padding='max_length': uniform tensor shapes for batching
-    """
-    return tokenizer(batch["text"], truncation=True, padding="max_length", max_length=256)
-
-# Apply tokenization across entire dataset (batched mapping for efficiency)
-dataset = dataset.map(tokenize, batched=True)
+# use_fast pins the Rust tokenizer, ~10x quicker than the Python fallback
+tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=True)
 
 # Derive consistent label ordering (sorted for reproducibility)
 labels = sorted(set(dataset["train"]["label"]))
 label2id = {l: i for i, l in enumerate(labels)}  # String label -> integer index
 id2label = {i: l for l, i in label2id.items()}   # Integer index -> string label
 
-def encode_labels(example):
-    """Add integer label encoding under key 'labels' expected by Trainer."""
-    example["labels"] = label2id[example["label"]]
-    return example
-
-# Map encoding function over datasets
-dataset = dataset.map(encode_labels)
+def preprocess(batch):
+    """
+    Tokenize a batch and attach integer labels in the same pass.
+    - truncation: ensures sequences don't exceed max_length
+    - no padding here: the DataCollatorWithPadding pads each batch only to
+      that batch's longest sequence, so short clause snippets stop paying
+      transformer FLOPs for up-to-256-token PAD runs
+    - fusing label encoding into this map avoids a second full pass over
+      the dataset's arrow tables
+    """
+    enc = tokenizer(batch["text"], truncation=True, max_length=256)
+    enc["labels"] = [label2id[l] for l in batch["label"]]
+    return enc
+
+# Apply preprocessing across the dataset, sharded over all cores.
+# remove_columns drops the raw string columns once they're encoded — the
+# DataLoader then collates pure int columns and never materializes the
+# per-row Python strings at batch time.
+dataset = dataset.map(
+    preprocess,
+    batched=True,
+    batch_size=1000,
+    num_proc=os.cpu_count(),
+    remove_columns=["text", "label"],
+)
 
 # Instantiate sequence classification model with correct label metadata
 model = AutoModelForSequenceClassification.from_pretrained(
@@ -79,11 +93,18 @@ training_args = TrainingArguments(
     evaluation_strategy="epoch",        # Evaluate after each epoch
     save_strategy="epoch",              # Save checkpoint each epoch
     learning_rate=2e-5,                 # Typical fine-tuning LR for transformers
-    per_device_train_batch_size=8,      # Training batch size
-    per_device_eval_batch_size=8,       # Evaluation batch size
+    per_device_train_batch_size=32,     # Larger batches fit once activations are half precision
+    per_device_eval_batch_size=32,      # Evaluation batch size
     num_train_epochs=3,                 # Total epochs
     weight_decay=0.01,                  # Regularization
     load_best_model_at_end=True,        # Restores best checkpoint (based on metric)
+    group_by_length=True,               # Batch similar-length samples to minimize padding
+    fp16=USE_FP16,                      # Half-precision activations + tensor-core matmuls
+    bf16=USE_BF16,                      # Preferred on hardware that supports it
+    torch_compile=torch.cuda.is_available(),  # Inductor-specialized DistilBERT graph
+    optim="adamw_torch_fused" if torch.cuda.is_available() else "adamw_torch",  # Fused optimizer step on GPU
+    dataloader_num_workers=4,           # Keep the GPU fed during tokenized-batch loading
+    dataloader_pin_memory=True,         # Pinned host memory speeds H2D copies
 )
 
 # Trainer orchestrates the training loop
@@ -93,6 +114,8 @@ trainer = Trainer(
     train_dataset=dataset["train"],
     eval_dataset=dataset["test"],
     tokenizer=tokenizer,
+    # Dynamic per-batch padding; multiples of 8 keep fp16 tensor cores happy
+    data_collator=DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8),
     compute_metrics=compute_metrics,
 )
 